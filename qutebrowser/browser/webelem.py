@@ -212,14 +212,14 @@ class AbstractWebElement(collections.abc.MutableMapping):
         """
         # Beginnings of div-classes which are actually some kind of editor.
         classes = {
-            'div': ['CodeMirror',  # Javascript editor over a textarea
+            'div': ('CodeMirror',  # Javascript editor over a textarea
                     'kix-',  # Google Docs editor
-                    'ace_'],  # http://ace.c9.io/
-            'pre': ['CodeMirror'],
+                    'ace_'),  # http://ace.c9.io/
+            'pre': ('CodeMirror',),
         }
         relevant_classes = classes[self.tag_name()]
         for klass in self.classes():
-            if any([klass.strip().startswith(e) for e in relevant_classes]):
+            if klass.strip().startswith(relevant_classes):
                 return True
         return False
 
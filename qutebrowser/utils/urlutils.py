@@ -20,7 +20,9 @@
 """Utils regarding URL handling."""
 
 import re
+import time
 import base64
+import collections
 import os.path
 import ipaddress
 import posixpath
@@ -38,6 +40,25 @@ from qutebrowser.browser.network import pac
 # FIXME: we probably could raise some exceptions on invalid URLs
 # https://github.com/qutebrowser/qutebrowser/issues/108
 
+_IPV6_RE = re.compile(r'\[?([0-9a-fA-F:.]+)\]?(.*)')
+
+_INCDEC_RE = re.compile(r'(.*\D|^)(0*)(\d+)(.*)')
+
+_SPECIAL_SCHEMES = frozenset(['about', 'qute', 'file'])
+
+_LOCALHOST_NAMES = frozenset(['localhost', '127.0.0.1', '::1'])
+
+_HTTP_PREFIXES = ('http://', 'https://')
+
+# How long (in seconds) a successful DNS lookup is remembered by
+# _host_resolves, and how many hosts are remembered at most.
+_DNS_CACHE_TTL = 60
+_DNS_CACHE_SIZE = 256
+
+# Maps hostnames which could be resolved to the time.monotonic() timestamp of
+# the lookup.
+_dns_cache = collections.OrderedDict()
+
 
 class InvalidUrlError(ValueError):
 
@@ -56,34 +77,37 @@ class InvalidUrlError(ValueError):
 
 
 def _parse_search_term(s):
-    """Get a search engine name and search term from a string.
+    """Get a search engine name, URL template and search term from a string.
 
     Args:
         s: The string to get a search engine for.
 
     Return:
-        A (engine, term) tuple, where engine is None for the default engine.
+        An (engine, template, term) tuple, where engine and template are None
+        for the default engine.
     """
     s = s.strip()
+    if not s:
+        raise ValueError("Empty search term!")
     split = s.split(maxsplit=1)
 
     if len(split) == 2:
         engine = split[0]
         try:
-            config.get('searchengines', engine)
+            template = config.get('searchengines', engine)
         except configexc.NoOptionError:
             engine = None
+            template = None
             term = s
         else:
             term = split[1]
-    elif not split:
-        raise ValueError("Empty search term!")
     else:
         engine = None
+        template = None
         term = s
 
     log.url.debug("engine {}, term {!r}".format(engine, term))
-    return (engine, term)
+    return (engine, template, term)
 
 
 def _get_search_url(txt):
@@ -96,27 +120,25 @@ def _get_search_url(txt):
         The search URL as a QUrl.
     """
     log.url.debug("Finding search engine for {!r}".format(txt))
-    engine, term = _parse_search_term(txt)
+    _engine, template, term = _parse_search_term(txt)
     assert term
-    if engine is None:
+    if template is None:
         template = config.get('searchengines', 'DEFAULT')
-    else:
-        template = config.get('searchengines', engine)
     url = qurl_from_user_input(template.format(urllib.parse.quote(term)))
     qtutils.ensure_valid(url)
     return url
 
 
-def _is_url_naive(urlstr):
+def _is_url_naive(urlstr, url):
     """Naive check if given URL is really a URL.
 
     Args:
         urlstr: The URL to check for, as string.
+        url: The same URL as QUrl, as returned by qurl_from_user_input.
 
     Return:
         True if the URL really is a URL, False otherwise.
     """
-    url = qurl_from_user_input(urlstr)
     assert url.isValid()
 
     if not utils.raises(ValueError, ipaddress.ip_address, urlstr):
@@ -133,16 +155,16 @@ def _is_url_naive(urlstr):
     return '.' in host and not host.endswith('.')
 
 
-def _is_url_dns(urlstr):
+def _is_url_dns(urlstr, url):
     """Check if a URL is really a URL via DNS.
 
     Args:
-        url: The URL to check for as a string.
+        urlstr: The URL to check for as a string.
+        url: The same URL as QUrl, as returned by qurl_from_user_input.
 
     Return:
         True if the URL really is a URL, False otherwise.
     """
-    url = qurl_from_user_input(urlstr)
     assert url.isValid()
 
     if (utils.raises(ValueError, ipaddress.ip_address, urlstr) and
@@ -156,9 +178,43 @@ def _is_url_dns(urlstr):
     if not host:
         log.url.debug("URL has no host -> False")
         return False
+    return _host_resolves(host)
+
+
+def _host_resolves(host):
+    """Check if the given host can be resolved via DNS.
+
+    The lookup blocks, so successful lookups get cached for _DNS_CACHE_TTL
+    seconds to avoid doing the same request over and over again. Failures are
+    never cached, as they might only be temporary (offline, captive portal,
+    VPN not up yet, ...). Note we can't use the async QHostInfo.lookupHost
+    here, as fuzzy_url/is_url callers expect a result synchronously.
+
+    Args:
+        host: The hostname to resolve, as string.
+
+    Return:
+        True if the host could be resolved, False otherwise.
+    """
+    now = time.monotonic()
+    timestamp = _dns_cache.get(host)
+    if timestamp is not None:
+        if now - timestamp < _DNS_CACHE_TTL:
+            log.url.debug("Got cached DNS result for {}".format(host))
+            _dns_cache.move_to_end(host)
+            return True
+        del _dns_cache[host]
+
     log.url.debug("Doing DNS request for {}".format(host))
     info = QHostInfo.fromName(host)
-    return not info.error()
+    if info.error():
+        return False
+
+    if len(_dns_cache) >= _DNS_CACHE_SIZE:
+        # Evict the least recently used host.
+        _dns_cache.popitem(last=False)
+    _dns_cache[host] = now
+    return True
 
 
 def fuzzy_url(urlstr, cwd=None, relative=False, do_search=True,
@@ -177,24 +233,39 @@ def fuzzy_url(urlstr, cwd=None, relative=False, do_search=True,
         A target QUrl to a search page or the original URL.
     """
     urlstr = urlstr.strip()
+    autosearch = config.get('general', 'auto-search')
     path = get_path_if_valid(urlstr, cwd=cwd, relative=relative,
                              check_exists=True)
 
     if not force_search and path is not None:
         url = QUrl.fromLocalFile(path)
-    elif force_search or (do_search and not is_url(urlstr)):
-        # probably a search term
-        log.url.debug("URL is a fuzzy search term")
-        try:
-            url = _get_search_url(urlstr)
-        except ValueError:  # invalid search engine
-            url = qurl_from_user_input(urlstr)
-    else:  # probably an address
-        log.url.debug("URL is a fuzzy address")
-        url = qurl_from_user_input(urlstr)
+    else:
+        qurl_userinput = None
+        search = force_search
+        if not force_search and do_search:
+            # Only parsed once, as is_url needs it as well.
+            qurl_userinput = qurl_from_user_input(urlstr)
+            search = not is_url(urlstr, autosearch=autosearch,
+                                qurl_userinput=qurl_userinput)
+
+        if search:
+            # probably a search term
+            log.url.debug("URL is a fuzzy search term")
+            try:
+                url = _get_search_url(urlstr)
+            except ValueError:  # invalid search engine
+                url = None
+        else:  # probably an address
+            log.url.debug("URL is a fuzzy address")
+            url = None
+
+        if url is None:
+            if qurl_userinput is None:
+                qurl_userinput = qurl_from_user_input(urlstr)
+            url = qurl_userinput
     log.url.debug("Converting fuzzy term {!r} to URL -> {}".format(
                   urlstr, url.toDisplayString()))
-    if do_search and config.get('general', 'auto-search') and urlstr:
+    if do_search and autosearch and urlstr:
         qtutils.ensure_valid(url)
     else:
         if not url.isValid():
@@ -226,38 +297,44 @@ def is_special_url(url):
     """
     if not url.isValid():
         return False
-    special_schemes = ('about', 'qute', 'file')
-    return url.scheme() in special_schemes
+    return url.scheme() in _SPECIAL_SCHEMES
 
 
-def is_url(urlstr):
+def is_url(urlstr, autosearch=None, qurl_userinput=None):
     """Check if url seems to be a valid URL.
 
     Args:
         urlstr: The URL as string.
+        autosearch: The auto-search setting to use, or None to get it from
+                    the config.
+        qurl_userinput: The stripped urlstr as returned by
+                        qurl_from_user_input, or None to convert it here.
 
     Return:
         True if it is a valid URL, False otherwise.
     """
-    autosearch = config.get('general', 'auto-search')
+    if autosearch is None:
+        autosearch = config.get('general', 'auto-search')
 
     log.url.debug("Checking if {!r} is a URL (autosearch={}).".format(
                   urlstr, autosearch))
 
     urlstr = urlstr.strip()
-    qurl = QUrl(urlstr)
-    qurl_userinput = qurl_from_user_input(urlstr)
 
     if not autosearch:
         # no autosearch, so everything is a URL unless it has an explicit
         # search engine.
         try:
-            engine, _term = _parse_search_term(urlstr)
+            engine, _template, _term = _parse_search_term(urlstr)
         except ValueError:
             return False
         else:
             return engine is None
 
+    qurl = QUrl(urlstr)
+    if qurl_userinput is None:
+        qurl_userinput = qurl_from_user_input(urlstr)
+
     if not qurl_userinput.isValid():
         # This will also catch URLs containing spaces.
         return False
@@ -266,7 +343,7 @@ def is_url(urlstr):
         # URLs with explicit schemes are always URLs
         log.url.debug("Contains explicit scheme")
         url = True
-    elif qurl_userinput.host() in ['localhost', '127.0.0.1', '::1']:
+    elif qurl_userinput.host() in _LOCALHOST_NAMES:
         log.url.debug("Is localhost.")
         url = True
     elif is_special_url(qurl):
@@ -277,10 +354,10 @@ def is_url(urlstr):
         log.url.debug("Checking via DNS check")
         # We want to use qurl_from_user_input here, as the user might enter
         # "foo.de" and that should be treated as URL here.
-        url = _is_url_dns(urlstr)
+        url = _is_url_dns(urlstr, qurl_userinput)
     elif autosearch == 'naive':
         log.url.debug("Checking via naive check")
-        url = _is_url_naive(urlstr)
+        url = _is_url_naive(urlstr, qurl_userinput)
     else:  # pragma: no cover
         raise ValueError("Invalid autosearch value")
     log.url.debug("url = {}".format(url))
@@ -305,13 +382,20 @@ def qurl_from_user_input(urlstr):
     Return:
         The converted QUrl.
     """
+    stripped = urlstr.strip()
+    # Fully qualified http(s) URLs are the common case, and for those
+    # QUrl.fromUserInput would end up with the same QUrl anyways.
+    if stripped.startswith(_HTTP_PREFIXES):
+        url = QUrl(stripped)
+        if url.isValid() and url.host():
+            return url
     # First we try very liberally to separate something like an IPv6 from the
     # rest (e.g. path info or parameters)
-    match = re.match(r'\[?([0-9a-fA-F:.]+)\]?(.*)', urlstr.strip())
+    match = _IPV6_RE.match(stripped)
     if match:
         ipstr, rest = match.groups()
     else:
-        ipstr = urlstr.strip()
+        ipstr = stripped
         rest = ''
     # Then we try to parse it as an IPv6, and if we fail use
     # QUrl.fromUserInput.
@@ -565,7 +649,7 @@ def incdec_number(url, incdec, count=1, segments=None):
             continue
 
         # Get the last number in a string
-        match = re.match(r'(.*\D|^)(0*)(\d+)(.*)', getter())
+        match = _INCDEC_RE.match(getter())
         if not match:
             continue
 
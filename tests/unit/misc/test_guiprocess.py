@@ -40,8 +40,8 @@ def proc(qtbot, caplog):
                                   raising=False) as blocker:
                 p._proc.terminate()
             if not blocker.signal_triggered:
-                p._proc.kill()
-            p._proc.waitForFinished()
+                with qtbot.waitSignal(p.finished, timeout=10000):
+                    p._proc.kill()
 
 
 @pytest.fixture()
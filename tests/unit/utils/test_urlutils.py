@@ -86,6 +86,7 @@ def fake_dns(monkeypatch):
     """
     dns = FakeDNS()
     monkeypatch.setattr(urlutils.QHostInfo, 'fromName', dns.fromname_mock)
+    monkeypatch.setattr(urlutils, '_dns_cache', collections.OrderedDict())
     return dns
 
 
@@ -249,6 +250,16 @@ class TestFuzzyUrl:
 
         assert url == QUrl('search_url')
 
+    def test_force_search_no_user_input(self, get_search_url_mock, mocker):
+        """Make sure a successful forced search doesn't parse the input."""
+        get_search_url_mock.return_value = QUrl('search_url')
+        m = mocker.patch('qutebrowser.utils.urlutils.qurl_from_user_input')
+
+        url = urlutils.fuzzy_url('foo', force_search=True)
+
+        assert url == QUrl('search_url')
+        assert not m.called
+
     @pytest.mark.parametrize('path, check_exists', [
         ('/foo', False),
         ('/bar', True),
@@ -369,16 +380,17 @@ def test_is_url(urlutils_config_stub, fake_dns, is_url, is_url_no_autosearch,
     urlutils_config_stub.data['general']['auto-search'] = auto_search
     if auto_search == 'dns':
         if uses_dns:
-            fake_dns.answer = True
+            # Failed lookups aren't cached, so check them first.
+            fake_dns.answer = False
             result = urlutils.is_url(url)
             assert fake_dns.used
-            assert result
+            assert not result
             fake_dns.reset()
 
-            fake_dns.answer = False
+            fake_dns.answer = True
             result = urlutils.is_url(url)
             assert fake_dns.used
-            assert not result
+            assert result
         else:
             result = urlutils.is_url(url)
             assert not fake_dns.used
@@ -396,6 +408,68 @@ def test_is_url(urlutils_config_stub, fake_dns, is_url, is_url_no_autosearch,
             auto_search))
 
 
+def test_is_url_autosearch_arg(urlutils_config_stub, fake_dns):
+    """Make sure an explicitly given autosearch value overrides the config."""
+    urlutils_config_stub.data['general']['auto-search'] = 'dns'
+    assert urlutils.is_url('qutebrowser.org', autosearch='naive')
+    assert not fake_dns.used
+
+
+def test_is_url_dns_cached(urlutils_config_stub, fake_dns):
+    """Make sure the same host isn't resolved twice."""
+    urlutils_config_stub.data['general']['auto-search'] = 'dns'
+    fake_dns.answer = True
+    assert urlutils.is_url('qutebrowser.org')
+    assert fake_dns.used
+    # fromname_mock raises if it gets used twice
+    assert urlutils.is_url('qutebrowser.org/foo')
+
+
+def test_is_url_dns_failure_not_cached(urlutils_config_stub, fake_dns):
+    """Make sure a failed DNS lookup is retried on the next check."""
+    urlutils_config_stub.data['general']['auto-search'] = 'dns'
+    fake_dns.answer = False
+    assert not urlutils.is_url('qutebrowser.org')
+    fake_dns.reset()
+
+    fake_dns.answer = True
+    assert urlutils.is_url('qutebrowser.org')
+    assert fake_dns.used
+
+
+def test_is_url_dns_cache_expiry(urlutils_config_stub, fake_dns,
+                                 monkeypatch):
+    """Make sure cached DNS results get resolved again after the TTL."""
+    urlutils_config_stub.data['general']['auto-search'] = 'dns'
+    now = 1000
+    monkeypatch.setattr(urlutils.time, 'monotonic', lambda: now)
+
+    fake_dns.answer = True
+    assert urlutils.is_url('qutebrowser.org')
+    assert fake_dns.used
+
+    # Still cached, fromname_mock raises if it gets used twice
+    now += urlutils._DNS_CACHE_TTL - 1
+    assert urlutils.is_url('qutebrowser.org')
+
+    now += 2
+    fake_dns.reset()
+    fake_dns.answer = False
+    assert not urlutils.is_url('qutebrowser.org')
+    assert fake_dns.used
+
+
+def test_dns_cache_size(fake_dns, monkeypatch):
+    """Make sure the least recently used host gets evicted."""
+    monkeypatch.setattr(urlutils, '_DNS_CACHE_SIZE', 2)
+    for host in ['one.example', 'two.example', 'one.example',
+                 'three.example']:
+        fake_dns.reset()
+        fake_dns.answer = True
+        assert urlutils._host_resolves(host)
+    assert list(urlutils._dns_cache) == ['one.example', 'three.example']
+
+
 @pytest.mark.parametrize('user_input, output', [
     ('qutebrowser.org', 'http://qutebrowser.org'),
     ('http://qutebrowser.org', 'http://qutebrowser.org'),
@@ -407,6 +481,8 @@ def test_is_url(urlutils_config_stub, fake_dns, is_url, is_url_no_autosearch,
     ('::1/foo', 'http://[::1]/foo'),
     ('[::1]/foo', 'http://[::1]/foo'),
     ('http://[::1]', 'http://[::1]'),
+    (' https://qutebrowser.org/foo?bar=baz ',
+     'https://qutebrowser.org/foo?bar=baz'),
 ])
 def test_qurl_from_user_input(user_input, output):
     """Test qurl_from_user_input.
@@ -419,6 +495,13 @@ def test_qurl_from_user_input(user_input, output):
     assert url.toString() == output
 
 
+@pytest.mark.parametrize('user_input', ['http://', 'https:///foo'])
+def test_qurl_from_user_input_no_host(user_input):
+    """Make sure http(s) URLs without a host fall back to fromUserInput."""
+    url = urlutils.qurl_from_user_input(user_input)
+    assert url == QUrl.fromUserInput(user_input)
+
+
 @pytest.mark.parametrize('url, valid, has_err_string', [
     ('http://www.example.com/', True, False),
     ('', False, False),